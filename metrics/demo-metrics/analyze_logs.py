@@ -5,13 +5,26 @@ Uses only matched samples (same audio across both runs). Outputs to analysis_out
 from __future__ import annotations
 
 import json
+import mmap
+import os
+import pickle
 import re
-from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import pyarrow  # enables DataFrame.to_parquet
+except ImportError:
+    pyarrow = None
+
 try:
     import matplotlib
     matplotlib.use("Agg")
@@ -24,68 +37,127 @@ ONNX_LOG = METRICS_DIR / "ysdede.github.io-1771680286452--onnx-preprocessor--v2-
 MELJS_LOG = METRICS_DIR / "ysdede.github.io-1771680737564-meljs-preprocessor--v2-encoder-32-decoder-wasm-8.log"
 OUT_DIR = METRICS_DIR / "analysis_out"
 FIGURES_DIR = OUT_DIR / "figures"
+# Parsed logs are cached here so analyze_logs and generate_dashboard parse each log once.
+LOG_CACHE_DIR = OUT_DIR / ".cache"
+LOG_CACHE_VERSION = 2  # bump when the parsing in _parse_log changes
 
 # Assumption: when total_ms is missing from Object line, we use (time from Perf line) * 1000.
 # Stage times (pre/enc/dec) from Object; if Object has Total we use it, else total_ms = time_s * 1000.
 DURATION_TOLERANCE_S = 0.02  # for duration-based matching when reference missing
 
 
-def _parse_object_line(line: str) -> dict | None:
-    """Extract Preprocess, Encode, Decode, Total from Object line. Supports both quote styles."""
-    out = {}
-    # Style 1: Preprocess'7.4 ms' Encode'84.2 ms' Decode'25.2 ms' Total'118.0 ms'
-    m = re.search(r"Preprocess['\"]?\s*([\d.]+)\s*ms", line)
-    if m:
-        out["preprocess_ms"] = float(m.group(1))
-    m = re.search(r"Encode['\"]?\s*:\s*['\"]?([\d.]+)\s*ms|Encode['\"]?\s*([\d.]+)\s*ms", line)
-    if m:
-        out["encoder_ms"] = float(m.group(1) or m.group(2))
-    m = re.search(r"Decode['\"]?\s*:\s*['\"]?([\d.]+)\s*ms|Decode['\"]?\s*([\d.]+)\s*ms", line)
-    if m:
-        out["decoder_ms"] = float(m.group(1) or m.group(2))
-    m = re.search(r"Total['\"]?\s*:\s*['\"]?([\d.]+)\s*ms|Total['\"]?\s*([\d.]+)\s*ms", line)
-    if m:
-        out["total_ms"] = float(m.group(1) or m.group(2))
-    return out if out else None
-
-
-def load_log(path: Path, mode_name: str) -> pd.DataFrame:
-    """Load a single .log file (browser-console style). Returns normalized rows with required fields."""
-    text = path.read_text(encoding="utf-8", errors="replace")
-    lines = text.splitlines()
-
-    ref_re = re.compile(r'\[Dataset\] Reference:\s*"([^"]*)"')
-    preproc_re = re.compile(r"\[Parakeet\] Preprocessor:\s*\w+,\s*(\d+)\s*frames.*?([\d.]+)\s*ms")
-    perf_re = re.compile(r"\[Perf\] RTF:\s*([\d.]+)x\s*\(audio\s*([\d.]+)\s*s,\s*time\s*([\d.]+)\s*s\)")
-
-    rows = []
-    i = 0
+# One scan over the whole log. A sample is a Preprocessor line immediately followed by its
+# Perf line; the Object line after that is captured by lookahead so it is still scanned.
+_LOG_RE = re.compile(
+    rb'\[Dataset\] Reference:\s*"(?P<ref>[^"\n]*)"'
+    rb"|\[Parakeet\] Preprocessor:\s*\w+,\s*\d+\s*frames.*?(?P<pre_ms>[\d.]+)\s*ms.*\n"
+    rb".*?\[Perf\] RTF:\s*(?P<rtfx>[\d.]+)x\s*\(audio\s*(?P<audio_s>[\d.]+)\s*s,\s*time\s*(?P<time_s>[\d.]+)\s*s\)"
+    rb".*(?:\n(?=(?P<obj>.*)))?"
+)
+
+# Optional DFA prefilter: every _LOG_RE match starts with one of these literal markers, so when
+# hyperscan is installed it locates them in one pass and _LOG_RE only runs at those offsets.
+_MARKER_DB = None
+if hyperscan is not None:
+    _MARKER_DB = hyperscan.Database()
+    _MARKER_DB.compile(
+        expressions=[rb"\[Dataset\] Reference:", rb"\[Parakeet\] Preprocessor:"],
+        ids=[0, 1],
+        elements=2,
+        flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * 2,
+    )
+
+# Object line fields. Both quote styles are covered by one pattern per field:
+#   Preprocess'7.4 ms' Encode'84.2 ms' ...   and   Encode: '84.2 ms' ...
+_OBJ_PATTERNS = {
+    "preprocess_ms": re.compile(r"Preprocess['\"]?\s*([\d.]+)\s*ms"),
+    "encoder_ms": re.compile(r"Encode['\"]?\s*(?::\s*['\"]?)?([\d.]+)\s*ms"),
+    "decoder_ms": re.compile(r"Decode['\"]?\s*(?::\s*['\"]?)?([\d.]+)\s*ms"),
+    "total_ms": re.compile(r"Total['\"]?\s*(?::\s*['\"]?)?([\d.]+)\s*ms"),
+}
+
+
+@lru_cache(maxsize=4096)
+def _parse_object_line(line: str) -> tuple[tuple[str, float], ...]:
+    """
+    Extract Preprocess, Encode, Decode, Total from Object line as (key, ms) pairs. Supports both quote styles.
+    Cached because warmup/replay runs repeat identical Object lines; callers wrap the result in dict().
+    """
+    out = []
+    for key, pat in _OBJ_PATTERNS.items():
+        m = pat.search(line)
+        if m:
+            out.append((key, float(m.group(1))))
+    return tuple(out)
+
+
+def _log_matches(buf):
+    """Yield _LOG_RE matches over buf in order (same results as _LOG_RE.finditer)."""
+    if _MARKER_DB is None:
+        yield from _LOG_RE.finditer(buf)
+        return
+    starts = []
+    _MARKER_DB.scan(buf, match_event_handler=lambda _id, start, _end, _flags, _ctx: starts.append(start))
+    end = 0
+    for start in sorted(starts):
+        if start < end:
+            continue  # inside the previous sample, which finditer would have consumed
+        m = _LOG_RE.match(buf, start)
+        if m:
+            end = m.end()
+            yield m
+
+
+def load_log(path: Path, mode_name: str, cache_dir: Path | None = LOG_CACHE_DIR) -> pd.DataFrame:
+    """
+    Load a single .log file (browser-console style). Returns normalized rows with required fields.
+    Results are cached in cache_dir keyed on the log's size and mtime; pass cache_dir=None to always re-parse.
+    """
+    st = path.stat()
+    key = (LOG_CACHE_VERSION, st.st_size, st.st_mtime_ns)
+    cache_path = cache_dir / f"{path.stem}.{mode_name}.pkl" if cache_dir is not None else None
+    if cache_path is not None and cache_path.exists():
+        try:
+            with open(cache_path, "rb") as f:
+                cached_key, cached_df = pickle.load(f)
+            if cached_key == key:
+                return cached_df
+        except Exception:
+            pass  # unreadable or written by another pandas version; re-parse below
+    df = _parse_log(path, mode_name)
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, "wb") as f:
+            pickle.dump((key, df), f, protocol=pickle.HIGHEST_PROTOCOL)
+    return df
+
+
+def _parse_log(path: Path, mode_name: str) -> pd.DataFrame:
+    """Parse a log file into one row per sample (see load_log)."""
+    cols = {
+        "reference": [],
+        "duration_s": [],
+        "preprocess_ms": [],
+        "encoder_ms": [],
+        "decoder_ms": [],
+        "total_ms": [],
+        "rtfx_total": [],
+    }
     current_ref = None
-    while i < len(lines):
-        line = lines[i]
-        ref_m = ref_re.search(line)
-        if ref_m:
-            current_ref = ref_m.group(1).strip()
-            i += 1
-            continue
-        pre_m = preproc_re.search(line)
-        if pre_m:
-            preprocess_ms = float(pre_m.group(2))
-            i += 1
-            if i >= len(lines):
-                break
-            perf_m = perf_re.search(lines[i])
-            if not perf_m:
-                i += 1
+    if path.stat().st_size == 0:
+        return pd.DataFrame()
+    # Scan the mapped bytes directly; only captured groups are decoded.
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for m in _log_matches(mm):
+            if m["ref"] is not None:
+                current_ref = m["ref"].decode("utf-8", errors="replace").strip()
                 continue
-            rtfx = float(perf_m.group(1))
-            duration_s = float(perf_m.group(2))
-            time_s = float(perf_m.group(3))
-            total_ms = time_s * 1000.0
+            preprocess_ms = float(m["pre_ms"])
+            rtfx = float(m["rtfx"])
+            duration_s = float(m["audio_s"])
+            total_ms = float(m["time_s"]) * 1000.0
             encoder_ms = decoder_ms = np.nan
-            obj = None
-            if i + 1 < len(lines):
-                obj = _parse_object_line(lines[i + 1])
+            obj = dict(_parse_object_line(m["obj"].decode("utf-8", errors="replace"))) if m["obj"] is not None else None
             if obj:
                 encoder_ms = obj.get("encoder_ms", np.nan)
                 decoder_ms = obj.get("decoder_ms", np.nan)
@@ -93,24 +165,20 @@ def load_log(path: Path, mode_name: str) -> pd.DataFrame:
                     total_ms = obj["total_ms"]
                 if "preprocess_ms" in obj:
                     preprocess_ms = obj["preprocess_ms"]
-            rtfx_computed = (total_ms / 1000.0) / duration_s if duration_s > 0 else np.nan
-            rows.append({
-                "reference": current_ref,
-                "duration_s": duration_s,
-                "preprocess_ms": preprocess_ms,
-                "encoder_ms": encoder_ms,
-                "decoder_ms": decoder_ms,
-                "total_ms": total_ms,
-                "rtfx_total": rtfx,
-                "mode": mode_name,
-            })
-            i += 1
-            continue
-        i += 1
-
-    df = pd.DataFrame(rows)
-    if df.empty:
-        return df
+            cols["reference"].append(current_ref)
+            cols["duration_s"].append(duration_s)
+            cols["preprocess_ms"].append(preprocess_ms)
+            cols["encoder_ms"].append(encoder_ms)
+            cols["decoder_ms"].append(decoder_ms)
+            cols["total_ms"].append(total_ms)
+            cols["rtfx_total"].append(rtfx)
+
+    if not cols["duration_s"]:
+        return pd.DataFrame()
+    df = pd.DataFrame(cols)
+    # Repeated strings are dictionary-encoded: one int8 code per row instead of a str object.
+    df["reference"] = df["reference"].astype("category")
+    df["mode"] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[mode_name])
     # If rtfx_total missing (shouldn't be), compute
     miss = df["rtfx_total"].isna()
     if miss.any():
@@ -118,6 +186,11 @@ def load_log(path: Path, mode_name: str) -> pd.DataFrame:
     return df
 
 
+def _has_reference(df: pd.DataFrame) -> np.ndarray:
+    """True for rows carrying a non-empty reference string."""
+    return df["reference"].astype("string").fillna("").str.len().to_numpy() > 0
+
+
 def build_matched(
     onnx_df: pd.DataFrame, meljs_df: pd.DataFrame
 ) -> pd.DataFrame:
@@ -125,195 +198,178 @@ def build_matched(
     Match rows by reference (primary) or duration_s with tolerance.
     Drops ambiguous or low-confidence matches. Returns one row per matched sample with both modes + deltas.
     """
-    # Key: normalized reference (strip) or None; value: list of (duration_s, row_idx, df)
-    def by_ref(df: pd.DataFrame):
-        key_to_rows = {}
-        for idx, row in df.iterrows():
-            ref = row["reference"]
-            if pd.isna(ref) or ref == "" or ref is None:
-                key = ("__duration__", round(row["duration_s"], 3))
-            else:
-                key = ("__ref__", ref.strip())
-            key_to_rows.setdefault(key, []).append((row["duration_s"], idx, row))
-        return key_to_rows
-
-    onnx_by = by_ref(onnx_df)
-    meljs_by = by_ref(meljs_df)
-
-    # Match by reference first
-    all_refs = set(k for t, k in onnx_by if t == "__ref__") & set(k for t, k in meljs_by if t == "__ref__")
-    matched_rows = []
-    used_onnx = set()
-    used_meljs = set()
-
-    for ref in all_refs:
-        ok = onnx_by.get(("__ref__", ref), [])
-        mk = meljs_by.get(("__ref__", ref), [])
-        if len(ok) != 1 or len(mk) != 1:
-            continue
-        (_, oidx, orow), (_, midx, mrow) = ok[0], mk[0]
-        if abs(orow["duration_s"] - mrow["duration_s"]) > DURATION_TOLERANCE_S:
-            continue
-        used_onnx.add(oidx)
-        used_meljs.add(midx)
-        duration_s = orow["duration_s"]
-        matched_rows.append({
-            "audio_id": ref[:80] + ("..." if len(ref) > 80 else ""),
-            "reference": ref,
-            "duration_s": duration_s,
-            "preprocess_ms_onnx": orow["preprocess_ms"],
-            "encoder_ms_onnx": orow["encoder_ms"],
-            "decoder_ms_onnx": orow["decoder_ms"],
-            "total_ms_onnx": orow["total_ms"],
-            "rtfx_onnx": orow["rtfx_total"],
-            "preprocess_ms_meljs": mrow["preprocess_ms"],
-            "encoder_ms_meljs": mrow["encoder_ms"],
-            "decoder_ms_meljs": mrow["decoder_ms"],
-            "total_ms_meljs": mrow["total_ms"],
-            "rtfx_meljs": mrow["rtfx_total"],
-        })
-
-    # Match by duration only for samples without reference (e.g. first sample life_Jim.wav)
-    onnx_dur_rows = []
-    for key in onnx_by:
-        if key[0] != "__duration__":
-            continue
-        for (d, oidx, orow) in onnx_by[key]:
-            onnx_dur_rows.append((d, oidx, orow))
-    meljs_dur_rows = []
-    for key in meljs_by:
-        if key[0] != "__duration__":
-            continue
-        for (d, midx, mrow) in meljs_by[key]:
-            meljs_dur_rows.append((d, midx, mrow))
-    for (d, oidx, orow) in onnx_dur_rows:
-        if oidx in used_onnx:
-            continue
-        cands = [(midx, mrow) for (md, midx, mrow) in meljs_dur_rows if midx not in used_meljs and abs(md - d) <= DURATION_TOLERANCE_S]
-        if len(cands) != 1:
-            continue
-        midx, mrow = cands[0]
-        used_onnx.add(oidx)
-        used_meljs.add(midx)
-        matched_rows.append({
-            "audio_id": f"duration_{orow['duration_s']:.2f}s",
-            "reference": "",
-            "duration_s": orow["duration_s"],
-            "preprocess_ms_onnx": orow["preprocess_ms"],
-            "encoder_ms_onnx": orow["encoder_ms"],
-            "decoder_ms_onnx": orow["decoder_ms"],
-            "total_ms_onnx": orow["total_ms"],
-            "rtfx_onnx": orow["rtfx_total"],
-            "preprocess_ms_meljs": mrow["preprocess_ms"],
-            "encoder_ms_meljs": mrow["encoder_ms"],
-            "decoder_ms_meljs": mrow["decoder_ms"],
-            "total_ms_meljs": mrow["total_ms"],
-            "rtfx_meljs": mrow["rtfx_total"],
-        })
-
-    # Fallback: match unmatched by duration_s only when unique (1:1) to increase matches
-    onnx_unmatched = [ (idx, row) for idx, row in onnx_df.iterrows() if idx not in used_onnx ]
-    from collections import defaultdict
-    meljs_unmatched = [ (idx, row) for idx, row in meljs_df.iterrows() if idx not in used_meljs ]
-    def duration_key(r):
-        return round(r["duration_s"], 2)
-    onnx_by_d = defaultdict(list)
-    for idx, row in onnx_unmatched:
-        onnx_by_d[duration_key(row)].append((idx, row))
-    meljs_by_d = defaultdict(list)
-    for idx, row in meljs_unmatched:
-        meljs_by_d[duration_key(row)].append((idx, row))
-    for d in list(onnx_by_d.keys()):
-        if d not in meljs_by_d or len(onnx_by_d[d]) != 1 or len(meljs_by_d[d]) != 1:
-            continue
-        (oidx, orow), (midx, mrow) = onnx_by_d[d][0], meljs_by_d[d][0]
-        if abs(orow["duration_s"] - mrow["duration_s"]) > DURATION_TOLERANCE_S:
-            continue
-        used_onnx.add(oidx)
-        used_meljs.add(midx)
-        ref = orow["reference"] if pd.notna(orow["reference"]) and orow["reference"] else ""
-        matched_rows.append({
-            "audio_id": (ref[:80] + "...") if len(ref) > 80 else (ref or f"duration_{orow['duration_s']:.2f}s"),
-            "reference": ref,
-            "duration_s": orow["duration_s"],
-            "preprocess_ms_onnx": orow["preprocess_ms"],
-            "encoder_ms_onnx": orow["encoder_ms"],
-            "decoder_ms_onnx": orow["decoder_ms"],
-            "total_ms_onnx": orow["total_ms"],
-            "rtfx_onnx": orow["rtfx_total"],
-            "preprocess_ms_meljs": mrow["preprocess_ms"],
-            "encoder_ms_meljs": mrow["encoder_ms"],
-            "decoder_ms_meljs": mrow["decoder_ms"],
-            "total_ms_meljs": mrow["total_ms"],
-            "rtfx_meljs": mrow["rtfx_total"],
-        })
-
-    return pd.DataFrame(matched_rows)
+    # Keep only keys that occur once per side (1:1), then one inner join on the key
+    # filtered by duration tolerance.
+    def pair_unique(onnx: pd.DataFrame, meljs: pd.DataFrame, keys) -> pd.DataFrame:
+        def unique(df: pd.DataFrame) -> pd.DataFrame:
+            key = keys(df)
+            return df.assign(mkey=key, row=df.index)[~key.duplicated(keep=False)]
+
+        pairs = unique(onnx).merge(unique(meljs), on="mkey", suffixes=("_onnx", "_meljs"))
+        return pairs[(pairs["duration_s_onnx"] - pairs["duration_s_meljs"]).abs() <= DURATION_TOLERANCE_S]
+
+    def take(df: pd.DataFrame, pos: list, suffix: str) -> pd.DataFrame:
+        return df.iloc[pos].assign(row=df.index[pos]).reset_index(drop=True).add_suffix(suffix)
+
+    onnx_ref, meljs_ref = _has_reference(onnx_df), _has_reference(meljs_df)
+
+    # Match by (stripped) reference first
+    primary = pair_unique(onnx_df[onnx_ref], meljs_df[meljs_ref], lambda df: df["reference"].astype("string").str.strip())
+    primary = primary.assign(
+        audio_id=[r[:80] + ("..." if len(r) > 80 else "") for r in primary["mkey"]], reference=primary["mkey"]
+    )
+
+    # Match by duration only for samples without reference (e.g. first sample life_Jim.wav): each
+    # ONNX row, in first-seen order of its 1 ms duration, takes the one still-unused meljs row within
+    # tolerance if exactly one exists. Unreferenced rows are few, so this stays a short loop.
+    onnx_pos, meljs_pos = np.flatnonzero(~onnx_ref), np.flatnonzero(~meljs_ref)
+    onnx_dur = onnx_df["duration_s"].to_numpy()[onnx_pos]
+    meljs_dur = meljs_df["duration_s"].to_numpy()[meljs_pos]
+    by_duration = {}
+    for k, d in zip(onnx_pos, onnx_dur):
+        by_duration.setdefault(round(d, 3), []).append((k, d))
+    meljs_free = np.ones(len(meljs_pos), dtype=bool)
+    dur_onnx, dur_meljs = [], []
+    for group in by_duration.values():
+        for k, d in group:
+            cands = np.flatnonzero(meljs_free & (np.abs(meljs_dur - d) <= DURATION_TOLERANCE_S))
+            if len(cands) == 1:
+                meljs_free[cands[0]] = False
+                dur_onnx.append(k)
+                dur_meljs.append(meljs_pos[cands[0]])
+    by_dur = pd.concat([take(onnx_df, dur_onnx, "_onnx"), take(meljs_df, dur_meljs, "_meljs")], axis=1)
+    by_dur = by_dur.assign(audio_id=[f"duration_{d:.2f}s" for d in by_dur["duration_s_onnx"]], reference="")
+
+    # Fallback: match unmatched by duration_s only when unique (1:1) to increase matches.
+    matched_onnx = pd.concat([primary["row_onnx"], by_dur["row_onnx"]])
+    matched_meljs = pd.concat([primary["row_meljs"], by_dur["row_meljs"]])
+    fallback = pair_unique(
+        onnx_df[~onnx_df.index.isin(matched_onnx)],
+        meljs_df[~meljs_df.index.isin(matched_meljs)],
+        lambda df: df["duration_s"].round(2),
+    )
+    refs = [r if isinstance(r, str) and r else "" for r in fallback["reference_onnx"].to_numpy(dtype=object)]
+    fallback = fallback.assign(
+        audio_id=[(r[:80] + "...") if len(r) > 80 else (r or f"duration_{d:.2f}s") for r, d in zip(refs, fallback["duration_s_onnx"])],
+        reference=refs,
+    )
+    pairs = pd.concat([primary, by_dur, fallback], ignore_index=True)
+
+    return pd.DataFrame({
+        "audio_id": pairs["audio_id"].to_numpy(dtype=object),
+        "reference": pairs["reference"].to_numpy(dtype=object),
+        "duration_s": pairs["duration_s_onnx"].to_numpy(),
+        "preprocess_ms_onnx": pairs["preprocess_ms_onnx"].to_numpy(),
+        "encoder_ms_onnx": pairs["encoder_ms_onnx"].to_numpy(),
+        "decoder_ms_onnx": pairs["decoder_ms_onnx"].to_numpy(),
+        "total_ms_onnx": pairs["total_ms_onnx"].to_numpy(),
+        "rtfx_onnx": pairs["rtfx_total_onnx"].to_numpy(),
+        "preprocess_ms_meljs": pairs["preprocess_ms_meljs"].to_numpy(),
+        "encoder_ms_meljs": pairs["encoder_ms_meljs"].to_numpy(),
+        "decoder_ms_meljs": pairs["decoder_ms_meljs"].to_numpy(),
+        "total_ms_meljs": pairs["total_ms_meljs"].to_numpy(),
+        "rtfx_meljs": pairs["rtfx_total_meljs"].to_numpy(),
+    })
 
 
 def derived_and_deltas(matched: pd.DataFrame) -> pd.DataFrame:
     """Add derived metrics and deltas. Drops rows with missing stage times if needed for shares."""
-    df = matched.copy()
-    for mode, pre, enc, dec, tot, rtf in [
-        ("onnx", "preprocess_ms_onnx", "encoder_ms_onnx", "decoder_ms_onnx", "total_ms_onnx", "rtfx_onnx"),
-        ("meljs", "preprocess_ms_meljs", "encoder_ms_meljs", "decoder_ms_meljs", "total_ms_meljs", "rtfx_meljs"),
-    ]:
-        d = df["duration_s"]
-        df[f"ms_per_sec_pre_{mode}"] = df[pre] / d
-        df[f"ms_per_sec_enc_{mode}"] = df[enc] / d
-        df[f"ms_per_sec_dec_{mode}"] = df[dec] / d
-        df[f"ms_per_sec_total_{mode}"] = df[tot] / d
-        t = df[tot].replace(0, np.nan)
-        df[f"pre_pct_{mode}"] = 100 * df[pre] / t
-        df[f"enc_pct_{mode}"] = 100 * df[enc] / t
-        df[f"dec_pct_{mode}"] = 100 * df[dec] / t
-    df["delta_rtfx"] = df["rtfx_meljs"] - df["rtfx_onnx"]
-    df["delta_pre_ms"] = df["preprocess_ms_meljs"] - df["preprocess_ms_onnx"]
-    df["delta_enc_ms"] = df["encoder_ms_meljs"] - df["encoder_ms_onnx"]
-    df["delta_dec_ms"] = df["decoder_ms_meljs"] - df["decoder_ms_onnx"]
-    df["delta_total_ms"] = df["total_ms_meljs"] - df["total_ms_onnx"]
-    df["delta_ms_per_sec_pre"] = df["ms_per_sec_pre_meljs"] - df["ms_per_sec_pre_onnx"]
-    df["delta_ms_per_sec_enc"] = df["ms_per_sec_enc_meljs"] - df["ms_per_sec_enc_onnx"]
-    df["delta_ms_per_sec_dec"] = df["ms_per_sec_dec_meljs"] - df["ms_per_sec_dec_onnx"]
-    return df
+    d = matched["duration_s"].to_numpy()
+    ms = {col: matched[col].to_numpy() for col in matched.columns if col.endswith(("_onnx", "_meljs"))}
+    new_cols = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for mode in ["onnx", "meljs"]:
+            pre = ms[f"preprocess_ms_{mode}"]
+            enc = ms[f"encoder_ms_{mode}"]
+            dec = ms[f"decoder_ms_{mode}"]
+            tot = ms[f"total_ms_{mode}"]
+            new_cols[f"ms_per_sec_pre_{mode}"] = pre / d
+            new_cols[f"ms_per_sec_enc_{mode}"] = enc / d
+            new_cols[f"ms_per_sec_dec_{mode}"] = dec / d
+            new_cols[f"ms_per_sec_total_{mode}"] = tot / d
+            t = np.where(tot == 0, np.nan, tot)
+            new_cols[f"pre_pct_{mode}"] = 100 * pre / t
+            new_cols[f"enc_pct_{mode}"] = 100 * enc / t
+            new_cols[f"dec_pct_{mode}"] = 100 * dec / t
+    new_cols["delta_rtfx"] = ms["rtfx_meljs"] - ms["rtfx_onnx"]
+    new_cols["delta_pre_ms"] = ms["preprocess_ms_meljs"] - ms["preprocess_ms_onnx"]
+    new_cols["delta_enc_ms"] = ms["encoder_ms_meljs"] - ms["encoder_ms_onnx"]
+    new_cols["delta_dec_ms"] = ms["decoder_ms_meljs"] - ms["decoder_ms_onnx"]
+    new_cols["delta_total_ms"] = ms["total_ms_meljs"] - ms["total_ms_onnx"]
+    new_cols["delta_ms_per_sec_pre"] = new_cols["ms_per_sec_pre_meljs"] - new_cols["ms_per_sec_pre_onnx"]
+    new_cols["delta_ms_per_sec_enc"] = new_cols["ms_per_sec_enc_meljs"] - new_cols["ms_per_sec_enc_onnx"]
+    new_cols["delta_ms_per_sec_dec"] = new_cols["ms_per_sec_dec_meljs"] - new_cols["ms_per_sec_dec_onnx"]
+    # Single assign: one block consolidation instead of one per column.
+    return matched.assign(**new_cols)
 
 
 def duration_vs_performance(matched: pd.DataFrame) -> dict:
     """Correlations and linear fits (duration_s -> stage/total/rtfx) per mode."""
+    # Pull every column once; x statistics are shared by all fully-valid series.
+    x = matched["duration_s"].to_numpy()
+    if len(x) >= 2:
+        x_mean = x.mean()
+        x_c = x - x_mean
+        x_sxx = x_c @ x_c
     result = {"onnx": {}, "meljs": {}}
     for mode in ["onnx", "meljs"]:
-        pre = f"preprocess_ms_{mode}" if mode == "onnx" else "preprocess_ms_meljs"
-        enc = f"encoder_ms_{mode}" if mode == "onnx" else "encoder_ms_meljs"
-        dec = f"decoder_ms_{mode}" if mode == "onnx" else "decoder_ms_meljs"
-        tot = f"total_ms_{mode}" if mode == "onnx" else "total_ms_meljs"
-        rtf = f"rtfx_{mode}" if mode == "onnx" else "rtfx_meljs"
-        x = matched["duration_s"].values
-        for name, ykey in [
-            ("preprocess_ms", pre),
-            ("encoder_ms", enc),
-            ("decoder_ms", dec),
-            ("total_ms", tot),
-            ("rtfx_total", rtf),
-            ("ms_per_sec_pre", f"ms_per_sec_pre_{mode}"),
-            ("ms_per_sec_enc", f"ms_per_sec_enc_{mode}"),
-            ("ms_per_sec_dec", f"ms_per_sec_dec_{mode}"),
-            ("ms_per_sec_total", f"ms_per_sec_total_{mode}"),
-        ]:
-            y = matched[ykey].values
+        cols = {
+            name: matched[ykey].to_numpy()
+            for name, ykey in [
+                ("preprocess_ms", f"preprocess_ms_{mode}"),
+                ("encoder_ms", f"encoder_ms_{mode}"),
+                ("decoder_ms", f"decoder_ms_{mode}"),
+                ("total_ms", f"total_ms_{mode}"),
+                ("rtfx_total", f"rtfx_{mode}"),
+                ("ms_per_sec_pre", f"ms_per_sec_pre_{mode}"),
+                ("ms_per_sec_enc", f"ms_per_sec_enc_{mode}"),
+                ("ms_per_sec_dec", f"ms_per_sec_dec_{mode}"),
+                ("ms_per_sec_total", f"ms_per_sec_total_{mode}"),
+            ]
+        }
+        for name, y in cols.items():
+            # isfinite rather than isnan: ms_per_sec_* is inf for zero-length samples.
             valid = np.isfinite(y)
-            if valid.sum() < 2:
+            n_valid = valid.sum()
+            if n_valid < 2:
                 result[mode][name] = {"corr": None, "slope": None, "intercept": None}
                 continue
-            xx, yy = x[valid], y[valid]
-            corr = float(np.corrcoef(xx, yy)[0, 1]) if np.std(yy) > 0 else None
-            if np.std(xx) > 0:
-                coeffs = np.polyfit(xx, yy, 1)
-                result[mode][name] = {"corr": corr, "slope": float(coeffs[0]), "intercept": float(coeffs[1])}
+            # Closed-form degree-1 least squares and Pearson r (no Vandermonde/lstsq).
+            if n_valid == len(y):
+                xm, xc, sxx, yy = x_mean, x_c, x_sxx, y
+            else:
+                xx, yy = x[valid], y[valid]
+                xm = xx.mean()
+                xc = xx - xm
+                sxx = xc @ xc
+            y_mean = yy.mean()
+            yc = yy - y_mean
+            syy, sxy = yc @ yc, xc @ yc
+            with np.errstate(divide="ignore", invalid="ignore"):
+                corr = float(np.clip(sxy / np.sqrt(sxx * syy), -1.0, 1.0)) if syy > 0 else None
+            if sxx > 0:
+                slope = sxy / sxx
+                result[mode][name] = {"corr": corr, "slope": float(slope), "intercept": float(y_mean - slope * xm)}
             else:
                 result[mode][name] = {"corr": corr, "slope": None, "intercept": None}
     return result
 
 
+def write_table(df: pd.DataFrame, path: Path) -> list[Path]:
+    """
+    Write a result table. Parquet (zstd) is the canonical copy when pyarrow is installed;
+    CSV is written when it is not, or when EMIT_CSV is set. Returns the paths written.
+    """
+    written = []
+    if pyarrow is not None:
+        df.to_parquet(path.with_suffix(".parquet"), compression="zstd", index=False)
+        written.append(path.with_suffix(".parquet"))
+    if pyarrow is None or os.environ.get("EMIT_CSV"):
+        df.to_csv(path.with_suffix(".csv"), index=False)
+        written.append(path.with_suffix(".csv"))
+    return written
+
+
 def main():
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     FIGURES_DIR.mkdir(parents=True, exist_ok=True)
@@ -357,68 +413,58 @@ def main():
 
     # --- Charts ---
     if plt is not None:
+        # All panels share one figure: a single Figure setup and a single Agg render.
+        fig, axes = plt.subplots(4, 2, figsize=(12, 18), constrained_layout=True)
+        dur = matched_clean["duration_s"].to_numpy()
+
         # A: Scatter duration vs RTFx (overlay onnx vs meljs)
-        fig, ax = plt.subplots()
-        ax.scatter(matched_clean["duration_s"], matched_clean["rtfx_onnx"], label="ONNX", alpha=0.7, s=20)
-        ax.scatter(matched_clean["duration_s"], matched_clean["rtfx_meljs"], label="meljs", alpha=0.7, s=20)
+        ax = axes[0, 0]
+        ax.scatter(dur, matched_clean["rtfx_onnx"].to_numpy(), label="ONNX", alpha=0.7, s=20)
+        ax.scatter(dur, matched_clean["rtfx_meljs"].to_numpy(), label="meljs", alpha=0.7, s=20)
         ax.set_xlabel("duration_s")
         ax.set_ylabel("rtfx_total")
-        ax.set_title("Duration vs RTFx (matched samples)")
+        ax.set_title("A: Duration vs RTFx (matched samples)")
         ax.legend()
         ax.grid(True, alpha=0.3)
-        fig.savefig(FIGURES_DIR / "A_duration_vs_rtfx.png", dpi=120, bbox_inches="tight")
-        plt.close(fig)
-
-        # B: Duration vs stage times (one plot per mode)
-        for mode, label in [("onnx", "ONNX"), ("meljs", "meljs")]:
-            fig, ax = plt.subplots()
-            pre = f"preprocess_ms_{mode}" if mode == "onnx" else "preprocess_ms_meljs"
-            enc = f"encoder_ms_{mode}" if mode == "onnx" else "encoder_ms_meljs"
-            dec = f"decoder_ms_{mode}" if mode == "onnx" else "decoder_ms_meljs"
-            tot = f"total_ms_{mode}" if mode == "onnx" else "total_ms_meljs"
-            ax.scatter(matched_clean["duration_s"], matched_clean[pre], label="preprocess_ms", alpha=0.7, s=15)
-            ax.scatter(matched_clean["duration_s"], matched_clean[enc], label="encoder_ms", alpha=0.7, s=15)
-            ax.scatter(matched_clean["duration_s"], matched_clean[dec], label="decoder_ms", alpha=0.7, s=15)
-            ax.scatter(matched_clean["duration_s"], matched_clean[tot], label="total_ms", alpha=0.7, s=15)
-            ax.set_xlabel("duration_s")
-            ax.set_ylabel("ms")
-            ax.set_title(f"Duration vs stage times ({label})")
-            ax.legend()
-            ax.grid(True, alpha=0.3)
-            fig.savefig(FIGURES_DIR / f"B_duration_vs_stages_{mode}.png", dpi=120, bbox_inches="tight")
-            plt.close(fig)
 
         # C: Delta plot duration vs delta RTFx
-        fig, ax = plt.subplots()
-        ax.scatter(matched_clean["duration_s"], matched_clean["delta_rtfx"], alpha=0.7, s=20)
+        ax = axes[0, 1]
+        ax.scatter(dur, matched_clean["delta_rtfx"].to_numpy(), alpha=0.7, s=20)
         ax.axhline(0, color="gray", linestyle="--")
         ax.set_xlabel("duration_s")
         ax.set_ylabel("delta_rtfx (meljs - onnx)")
-        ax.set_title("Duration vs Delta RTFx")
+        ax.set_title("C: Duration vs Delta RTFx")
         ax.grid(True, alpha=0.3)
-        fig.savefig(FIGURES_DIR / "C_duration_vs_delta_rtfx.png", dpi=120, bbox_inches="tight")
-        plt.close(fig)
+
+        # B: Duration vs stage times (one panel per mode)
+        for ax, mode, label in [(axes[1, 0], "onnx", "ONNX"), (axes[1, 1], "meljs", "meljs")]:
+            for stage in ["preprocess_ms", "encoder_ms", "decoder_ms", "total_ms"]:
+                ax.scatter(dur, matched_clean[f"{stage}_{mode}"].to_numpy(), label=stage, alpha=0.7, s=15)
+            ax.set_xlabel("duration_s")
+            ax.set_ylabel("ms")
+            ax.set_title(f"B: Duration vs stage times ({label})")
+            ax.legend()
+            ax.grid(True, alpha=0.3)
 
         # D: Distribution comparison
-        fig, axes = plt.subplots(1, 2, figsize=(10, 4))
-        axes[0].hist(matched_clean["rtfx_onnx"], bins=20, alpha=0.6, label="ONNX", density=True)
-        axes[0].hist(matched_clean["rtfx_meljs"], bins=20, alpha=0.6, label="meljs", density=True)
-        axes[0].set_xlabel("rtfx_total")
-        axes[0].set_ylabel("density")
-        axes[0].set_title("RTFx distribution (matched)")
-        axes[0].legend()
-        axes[0].grid(True, alpha=0.3)
-        axes[1].hist(matched_clean["delta_rtfx"], bins=20, alpha=0.7, color="green", density=True)
-        axes[1].axvline(0, color="gray", linestyle="--")
-        axes[1].set_xlabel("delta_rtfx")
-        axes[1].set_ylabel("density")
-        axes[1].set_title("Delta RTFx distribution")
-        axes[1].grid(True, alpha=0.3)
-        fig.savefig(FIGURES_DIR / "D_rtfx_distributions.png", dpi=120, bbox_inches="tight")
-        plt.close(fig)
+        ax = axes[2, 0]
+        ax.hist(matched_clean["rtfx_onnx"].to_numpy(), bins=20, alpha=0.6, label="ONNX", density=True)
+        ax.hist(matched_clean["rtfx_meljs"].to_numpy(), bins=20, alpha=0.6, label="meljs", density=True)
+        ax.set_xlabel("rtfx_total")
+        ax.set_ylabel("density")
+        ax.set_title("D: RTFx distribution (matched)")
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        ax = axes[2, 1]
+        ax.hist(matched_clean["delta_rtfx"].to_numpy(), bins=20, alpha=0.7, color="green", density=True)
+        ax.axvline(0, color="gray", linestyle="--")
+        ax.set_xlabel("delta_rtfx")
+        ax.set_ylabel("density")
+        ax.set_title("D: Delta RTFx distribution")
+        ax.grid(True, alpha=0.3)
 
         # E: Bottleneck view (mean stage share % per mode)
-        fig, ax = plt.subplots()
+        ax = axes[3, 0]
         modes = ["onnx", "meljs"]
         pre_pct = [matched_clean[f"pre_pct_{m}"].mean() for m in modes]
         enc_pct = [matched_clean[f"enc_pct_{m}"].mean() for m in modes]
@@ -431,14 +477,16 @@ def main():
         ax.set_xticks(x)
         ax.set_xticklabels(["ONNX", "meljs"])
         ax.set_ylabel("Mean share of total (%)")
-        ax.set_title("Mean stage share of total time (matched)")
+        ax.set_title("E: Mean stage share of total time (matched)")
         ax.legend()
         ax.grid(True, alpha=0.3, axis="y")
-        fig.savefig(FIGURES_DIR / "E_bottleneck_stage_share.png", dpi=120, bbox_inches="tight")
+        axes[3, 1].set_axis_off()
+
+        fig.savefig(FIGURES_DIR / "dashboard.png", dpi=100)
         plt.close(fig)
 
     # --- Write deliverables ---
-    matched_clean.to_csv(OUT_DIR / "matched_table.csv", index=False)
+    table_paths = write_table(matched_clean, OUT_DIR / "matched_table")
     with open(OUT_DIR / "stats.json", "w", encoding="utf-8") as f:
         json.dump(stats, f, indent=2)
 
@@ -467,11 +515,12 @@ def main():
         f"- Biggest RTFx improvement (max delta_rtfx): {agg['biggest_rtfx_improvement']:.3f}",
         "",
         "## Figures",
-        "- `figures/A_duration_vs_rtfx.png`: Duration vs RTFx (overlay ONNX vs meljs)",
-        "- `figures/B_duration_vs_stages_onnx.png`, `B_duration_vs_stages_meljs.png`: Duration vs stage times per mode",
-        "- `figures/C_duration_vs_delta_rtfx.png`: Duration vs delta RTFx",
-        "- `figures/D_rtfx_distributions.png`: RTFx and delta RTFx histograms",
-        "- `figures/E_bottleneck_stage_share.png`: Mean stage share (%) per mode",
+        "- `figures/dashboard.png`: all panels in one grid:",
+        "  - A: Duration vs RTFx (overlay ONNX vs meljs)",
+        "  - B: Duration vs stage times per mode",
+        "  - C: Duration vs delta RTFx",
+        "  - D: RTFx and delta RTFx histograms",
+        "  - E: Mean stage share (%) per mode",
         "",
         "## What to log next (actionable)",
         "- Stage start/end timestamps (to detect waiting/overlap).",
@@ -482,7 +531,7 @@ def main():
     (OUT_DIR / "summary.md").write_text("\n".join(summary_lines), encoding="utf-8")
 
     print("Done. Outputs in", OUT_DIR)
-    print("  summary.md, matched_table.csv, stats.json, figures/*.png")
+    print("  summary.md, " + ", ".join(p.name for p in table_paths) + ", stats.json, figures/dashboard.png")
 
 
 if __name__ == "__main__":
@@ -2,7 +2,12 @@ import json
 import numpy as np
 import pandas as pd
 from pathlib import Path
-from analyze_logs import load_log, build_matched, derived_and_deltas
+from analyze_logs import load_log, build_matched, derived_and_deltas, write_table
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 METRICS_DIR = Path(__file__).resolve().parent
 ONNX_LOG = METRICS_DIR / "ysdede.github.io-1771680286452--onnx-preprocessor--v2-encoder-32-decoder-wasm-8.log"
@@ -24,61 +29,49 @@ def compute_binned_stats(onnx_df: pd.DataFrame, meljs_df: pd.DataFrame, num_bins
     onnx_df['bin'] = pd.cut(onnx_df['duration_s'], bins)
     meljs_df['bin'] = pd.cut(meljs_df['duration_s'], bins)
     
-    binned_stats = []
-    
-    for b in onnx_df['bin'].cat.categories:
-        o_bin = onnx_df[onnx_df['bin'] == b]
-        m_bin = meljs_df[meljs_df['bin'] == b]
-        
-        o_rtfx_mean = o_bin['rtfx_total'].mean()
-        o_rtfx_median = o_bin['rtfx_total'].median()
-        m_rtfx_mean = m_bin['rtfx_total'].mean()
-        m_rtfx_median = m_bin['rtfx_total'].median()
-        
-        o_pre_mean = o_bin['preprocess_ms'].mean()
-        m_pre_mean = m_bin['preprocess_ms'].mean()
-        o_enc_mean = o_bin['encoder_ms'].mean()
-        m_enc_mean = m_bin['encoder_ms'].mean()
-        o_dec_mean = o_bin['decoder_ms'].mean()
-        m_dec_mean = m_bin['decoder_ms'].mean()
-        
-        # Bottleneck shares per bin
-        def mean_share(df, stage_col, total_col):
-            t = df[total_col].replace(0, np.nan)
-            return (100 * df[stage_col] / t).mean()
-            
-        o_pre_pct = mean_share(o_bin, 'preprocess_ms', 'total_ms')
-        m_pre_pct = mean_share(m_bin, 'preprocess_ms', 'total_ms')
-        o_enc_pct = mean_share(o_bin, 'encoder_ms', 'total_ms')
-        m_enc_pct = mean_share(m_bin, 'encoder_ms', 'total_ms')
-        o_dec_pct = mean_share(o_bin, 'decoder_ms', 'total_ms')
-        m_dec_pct = mean_share(m_bin, 'decoder_ms', 'total_ms')
-        
-        binned_stats.append({
-            "bin_label": f"{b.left:.2f}s - {b.right:.2f}s",
-            "bin_min_s": b.left,
-            "bin_max_s": b.right,
-            "count_onnx": len(o_bin),
-            "count_meljs": len(m_bin),
-            "rtfx_mean_onnx": o_rtfx_mean,
-            "rtfx_median_onnx": o_rtfx_median,
-            "rtfx_mean_meljs": m_rtfx_mean,
-            "rtfx_median_meljs": m_rtfx_median,
-            "pre_ms_mean_onnx": o_pre_mean,
-            "pre_ms_mean_meljs": m_pre_mean,
-            "enc_ms_mean_onnx": o_enc_mean,
-            "enc_ms_mean_meljs": m_enc_mean,
-            "dec_ms_mean_onnx": o_dec_mean,
-            "dec_ms_mean_meljs": m_dec_mean,
-            "pre_pct_onnx": o_pre_pct,
-            "pre_pct_meljs": m_pre_pct,
-            "enc_pct_onnx": o_enc_pct,
-            "enc_pct_meljs": m_enc_pct,
-            "dec_pct_onnx": o_dec_pct,
-            "dec_pct_meljs": m_dec_pct,
-        })
-        
-    return pd.DataFrame(binned_stats)
+    def per_bin(df: pd.DataFrame, suffix: str) -> pd.DataFrame:
+        # Bottleneck shares per row, then one grouped pass for all per-bin means/medians.
+        t = df['total_ms'].replace(0, np.nan)
+        df = df.assign(
+            pre_pct=100 * df['preprocess_ms'] / t,
+            enc_pct=100 * df['encoder_ms'] / t,
+            dec_pct=100 * df['decoder_ms'] / t,
+        )
+        grouped = df.groupby('bin', observed=False).agg(
+            count=('duration_s', 'size'),
+            rtfx_mean=('rtfx_total', 'mean'),
+            rtfx_median=('rtfx_total', 'median'),
+            pre_ms_mean=('preprocess_ms', 'mean'),
+            enc_ms_mean=('encoder_ms', 'mean'),
+            dec_ms_mean=('decoder_ms', 'mean'),
+            pre_pct=('pre_pct', 'mean'),
+            enc_pct=('enc_pct', 'mean'),
+            dec_pct=('dec_pct', 'mean'),
+        )
+        return grouped.add_suffix(suffix)
+
+    binned = per_bin(onnx_df, '_onnx').join(per_bin(meljs_df, '_meljs'))
+    intervals = onnx_df['bin'].cat.categories
+    binned['bin_label'] = [f"{b.left:.2f}s - {b.right:.2f}s" for b in intervals]
+    binned['bin_min_s'] = intervals.left.to_numpy()
+    binned['bin_max_s'] = intervals.right.to_numpy()
+
+    columns = [
+        'bin_label', 'bin_min_s', 'bin_max_s', 'count_onnx', 'count_meljs',
+        'rtfx_mean_onnx', 'rtfx_median_onnx', 'rtfx_mean_meljs', 'rtfx_median_meljs',
+        'pre_ms_mean_onnx', 'pre_ms_mean_meljs', 'enc_ms_mean_onnx', 'enc_ms_mean_meljs',
+        'dec_ms_mean_onnx', 'dec_ms_mean_meljs', 'pre_pct_onnx', 'pre_pct_meljs',
+        'enc_pct_onnx', 'enc_pct_meljs', 'dec_pct_onnx', 'dec_pct_meljs',
+    ]
+    return binned[columns].reset_index(drop=True)
+
+def write_json(path: Path, obj) -> None:
+    """Write obj as 2-space indented JSON, using orjson's native serializer when available."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, indent=2)
 
 def setup_html():
     pass # we will manually write the HTML file, the JS just injects the data
@@ -97,22 +90,26 @@ def main():
     matched = derived_and_deltas(matched)
     matched_clean = matched.dropna(subset=["rtfx_onnx", "rtfx_meljs", "total_ms_onnx", "total_ms_meljs"])
     
-    matched_csv_path = OUT_DIR / "comparison_exact.csv"
-    matched_clean.to_csv(matched_csv_path, index=False)
-    print(f"Saved: {matched_csv_path}")
+    for path in write_table(matched_clean, OUT_DIR / "comparison_exact"):
+        print(f"Saved: {path}")
     
     # BINNING
     print("Building binned data...")
     binned_df = compute_binned_stats(onnx_df, meljs_df, num_bins=8)
-    binned_csv_path = OUT_DIR / "comparison_binned.csv"
-    binned_df.to_csv(binned_csv_path, index=False)
-    print(f"Saved: {binned_csv_path}")
+    for path in write_table(binned_df, OUT_DIR / "comparison_binned"):
+        print(f"Saved: {path}")
     
     # Save standalone JSON for frontend
     def sanitize(df):
-        df = df.replace([np.inf, -np.inf], None)
-        df = df.where(pd.notnull(df), None)
-        return df.to_dict(orient="records")
+        # Null out NaN/inf column by column, then zip the columns into JSON-ready records.
+        columns = []
+        for col in df.columns:
+            values = df[col].to_numpy()
+            valid = df[col].notna().to_numpy()
+            if values.dtype.kind == "f":
+                valid = valid & np.isfinite(values)
+            columns.append(values.tolist() if valid.all() else np.where(valid, values, None).tolist())
+        return [dict(zip(df.columns, row)) for row in zip(*columns)]
 
     dashboard_data = {
         "dataset_onnx": sanitize(onnx_df),
@@ -122,8 +119,13 @@ def main():
     }
 
     data_js_path = OUT_DIR / "data.js"
-    with open(data_js_path, "w", encoding="utf-8") as f:
-        f.write("window.DASHBOARD_DATA = " + json.dumps(dashboard_data) + ";\n")
+    with open(data_js_path, "wb") as f:
+        f.write(b"window.DASHBOARD_DATA = ")
+        if orjson is not None:
+            f.write(orjson.dumps(dashboard_data, option=orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            f.write(json.dumps(dashboard_data).encode("utf-8"))
+        f.write(b";\n")
     print(f"Saved: {data_js_path}")
 
     # Generate a clean, Agent-compatible JSON with aggregates
@@ -138,37 +140,23 @@ def main():
         },
         "metrics": dashboard_data
     }
-    with open(results_json_path, "w", encoding="utf-8") as f:
-        json.dump(agg_stats, f, indent=2)
+    write_json(results_json_path, agg_stats)
     print(f"Saved: {results_json_path}")
 
     # Generate an ultra-clean, numeric-only agent summary
-    def round_dict_floats(d):
-        if isinstance(d, dict):
-            return {k: round_dict_floats(v) for k, v in d.items()}
-        elif isinstance(d, list):
-            return [round_dict_floats(x) for x in d]
-        elif isinstance(d, float):
-            return round(d, 2)
-        return d
-    
     agent_summary_path = OUT_DIR / "agent_summary.json"
-    clean_binned = round_dict_floats(sanitize(binned_df))
-    clean_exact = round_dict_floats(sanitize(matched_clean))
-    
+    # Round at the column level (one vectorized pass per column) before building records.
+    clean_binned = sanitize(binned_df.round(2))
     # Strip long strings from exact matches to save tokens for agents
-    for row in clean_exact:
-        row.pop("reference", None) 
-        row.pop("audio_id", None)
-        
+    clean_exact = sanitize(matched_clean.drop(columns=["reference", "audio_id"], errors="ignore").round(2))
+
     ultra_clean_stats = {
         "top_level_summary": agg_stats["summary"],
         "binned_comparisons": clean_binned,
         "exact_matches_numeric_only": clean_exact
     }
     
-    with open(agent_summary_path, "w", encoding="utf-8") as f:
-        json.dump(ultra_clean_stats, f, indent=2)
+    write_json(agent_summary_path, ultra_clean_stats)
     print(f"Saved: {agent_summary_path}")
 
 if __name__ == "__main__":
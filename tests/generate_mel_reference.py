@@ -19,21 +19,53 @@ Requirements:
 
 import argparse
 import base64
+import hashlib
 import json
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FEATURE_CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+FEATURE_CACHE_VERSION = 1  # bump when run_onnx_preprocessor's inputs or outputs change
+PREPROCESSOR_PROVIDERS = ("CPUExecutionProvider",)
+
+
+def _to_base64(arr: np.ndarray, dtype) -> str:
+    # ascontiguousarray is a no-op for arrays already in the right dtype and layout, and
+    # b64encode reads the buffer through a memoryview, so no intermediate bytes copy is made.
+    arr = np.ascontiguousarray(arr, dtype=dtype)
+    return base64.b64encode(memoryview(arr).cast("B")).decode("ascii")
+
 
 def float32_to_base64(arr: np.ndarray) -> str:
     """Encode float32 array as base64 string."""
-    return base64.b64encode(arr.astype(np.float32).tobytes()).decode("ascii")
+    return _to_base64(arr, np.float32)
 
 
 def float64_to_base64(arr: np.ndarray) -> str:
     """Encode float64 array as base64 string."""
-    return base64.b64encode(arr.astype(np.float64).tobytes()).decode("ascii")
+    return _to_base64(arr, np.float64)
+
+
+def write_f32(arr: np.ndarray, path: Path) -> None:
+    """Write array as raw little-endian float32 (readable in JS as a Float32Array)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.ascontiguousarray(arr, dtype="<f4").tofile(path)
+
+
+def _sine_mix(n_samples: int, tones, sample_rate: int = 16000) -> np.ndarray:
+    """Sum of amp * sin(2*pi*freq*t) over (freq, amp) tones, as float32."""
+    freqs, amps = np.array(tones, dtype=np.float64).T
+    t = np.arange(n_samples, dtype=np.float64) / sample_rate
+    # One vectorized sin over the (K, N) phase grid, then a single gemv for the weighted sum.
+    return (amps @ np.sin((2 * np.pi * freqs)[:, np.newaxis] * t)).astype(np.float32)
 
 
 def generate_test_signals():
@@ -41,20 +73,10 @@ def generate_test_signals():
     signals = {}
 
     # Test 1: Mix of sine waves (2 seconds)
-    N = 32000  # 2s at 16kHz
-    t = np.arange(N, dtype=np.float64) / 16000.0
-    audio = (
-        0.5 * np.sin(2 * np.pi * 440 * t)
-        + 0.3 * np.sin(2 * np.pi * 1000 * t)
-        + 0.1 * np.sin(2 * np.pi * 3000 * t)
-    ).astype(np.float32)
-    signals["sine_mix_2s"] = audio
+    signals["sine_mix_2s"] = _sine_mix(32000, [(440, 0.5), (1000, 0.3), (3000, 0.1)])
 
     # Test 2: Short signal (0.5 seconds)
-    N2 = 8000
-    t2 = np.arange(N2, dtype=np.float64) / 16000.0
-    audio2 = (0.7 * np.sin(2 * np.pi * 261.63 * t2)).astype(np.float32)  # Middle C
-    signals["sine_short_0.5s"] = audio2
+    signals["sine_short_0.5s"] = _sine_mix(8000, [(261.63, 0.7)])  # Middle C
 
     # Test 3: White noise-like (deterministic PRNG)
     rng = np.random.RandomState(42)
@@ -62,19 +84,22 @@ def generate_test_signals():
     signals["noise_1s"] = audio3
 
     # Test 4: 5 seconds (typical streaming window)
-    N4 = 80000
-    t4 = np.arange(N4, dtype=np.float64) / 16000.0
-    audio4 = (
-        0.4 * np.sin(2 * np.pi * 440 * t4)
-        + 0.2 * np.sin(2 * np.pi * 880 * t4)
-        + 0.15 * np.sin(2 * np.pi * 1320 * t4)
-        + 0.1 * np.sin(2 * np.pi * 2000 * t4)
-    ).astype(np.float32)
-    signals["sine_mix_5s"] = audio4
+    signals["sine_mix_5s"] = _sine_mix(
+        80000, [(440, 0.4), (880, 0.2), (1320, 0.15), (2000, 0.1)]
+    )
 
     return signals
 
 
+def write_json(path: Path, obj) -> None:
+    """Write obj as 2-space indented JSON, using orjson when available."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, indent=2)
+
+
 def get_nemo128_onnx_path():
     """Download nemo128.onnx from HuggingFace or use local copy."""
     # Try local onnx-asr built models first
@@ -104,11 +129,17 @@ def get_nemo128_onnx_path():
         sys.exit(1)
 
 
-def run_onnx_preprocessor(audio: np.ndarray, onnx_path: str):
-    """Run ONNX nemo128 preprocessor on audio."""
+@lru_cache(maxsize=None)
+def _preprocessor_session(onnx_path: str):
+    """Create the CPU InferenceSession for onnx_path once and reuse it across signals."""
     import onnxruntime as ort
 
-    session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    return ort.InferenceSession(onnx_path, providers=list(PREPROCESSOR_PROVIDERS))
+
+
+def run_onnx_preprocessor(audio: np.ndarray, onnx_path: str):
+    """Run ONNX nemo128 preprocessor on audio."""
+    session = _preprocessor_session(onnx_path)
 
     waveforms = audio[np.newaxis, :].astype(np.float32)  # [1, N]
     waveforms_lens = np.array([len(audio)], dtype=np.int64)  # [1]
@@ -121,6 +152,32 @@ def run_onnx_preprocessor(audio: np.ndarray, onnx_path: str):
     return features, int(features_lens[0])
 
 
+def cached_onnx_preprocessor(audio: np.ndarray, onnx_path: str, cache_dir: Path | None = FEATURE_CACHE_DIR):
+    """
+    run_onnx_preprocessor with results cached in cache_dir as .npz, keyed on a sha256 of the
+    float32 audio, the model file's path, size and mtime, the onnxruntime version and the
+    execution providers. Pass cache_dir=None to always run.
+    """
+    if cache_dir is None:
+        return run_onnx_preprocessor(audio, onnx_path)
+    import onnxruntime as ort
+
+    st = Path(onnx_path).stat()
+    digest = hashlib.sha256(np.ascontiguousarray(audio, dtype=np.float32))
+    digest.update(
+        f"{FEATURE_CACHE_VERSION}|{Path(onnx_path).resolve()}|{st.st_size}|{st.st_mtime_ns}"
+        f"|onnxruntime={ort.__version__}|{','.join(PREPROCESSOR_PROVIDERS)}".encode()
+    )
+    cache_path = cache_dir / f"{digest.hexdigest()}.npz"
+    if cache_path.exists():
+        with np.load(cache_path) as cached:
+            return cached["features"], int(cached["features_len"])
+    features, features_len = run_onnx_preprocessor(audio, onnx_path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    np.savez(cache_path, features=features, features_len=features_len)
+    return features, features_len
+
+
 def get_mel_filterbank():
     """Get the exact mel filterbank matrix used by torchaudio."""
     import torchaudio
@@ -152,7 +209,28 @@ def main():
         default=True,
         help="Include mel filterbank matrix in output",
     )
+    parser.add_argument(
+        "--raw-arrays",
+        action="store_true",
+        help="Store audio/features/filterbank as raw little-endian .f32 files next to the "
+        "JSON (referenced as *File keys) instead of base64. mel.test.mjs reads the "
+        "default base64 format.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Always rerun the ONNX preprocessor instead of reusing features cached in {FEATURE_CACHE_DIR}",
+    )
     args = parser.parse_args()
+    output_path = Path(args.output)
+    raw_dir = output_path.with_suffix("") if args.raw_arrays else None
+
+    def array_field(key: str, arr: np.ndarray, file_stem: str) -> dict:
+        if raw_dir is None:
+            return {key: float32_to_base64(arr)}
+        path = raw_dir / f"{file_stem}.f32"
+        write_f32(arr, path)
+        return {f"{key}File": path.relative_to(output_path.parent).as_posix()}
 
     # Get ONNX model
     onnx_path = get_nemo128_onnx_path()
@@ -166,15 +244,17 @@ def main():
     results = {}
     for name, audio in signals.items():
         print(f"  Processing '{name}': {len(audio)} samples ({len(audio)/16000:.2f}s)")
-        features, features_len = run_onnx_preprocessor(audio, onnx_path)
+        features, features_len = cached_onnx_preprocessor(
+            audio, onnx_path, cache_dir=None if args.no_cache else FEATURE_CACHE_DIR
+        )
         print(
             f"    → features shape: {features.shape}, valid frames: {features_len}"
         )
 
         results[name] = {
-            "audio": float32_to_base64(audio),
+            **array_field("audio", audio, f"{name}.audio"),
             "audioLength": len(audio),
-            "features": float32_to_base64(features.flatten()),
+            **array_field("features", features.ravel(), f"{name}.features"),
             "featuresShape": list(features.shape),
             "featuresLen": features_len,
             # Also save some raw values for quick sanity checks
@@ -192,7 +272,7 @@ def main():
             fb = get_mel_filterbank()
             print(f"  Filterbank shape: {fb.shape}")
             filterbank_data = {
-                "data": float32_to_base64(fb.flatten()),
+                **array_field("data", fb.ravel(), "melFilterbank"),
                 "shape": list(fb.shape),
                 "first10": fb.flatten()[:10].tolist(),
             }
@@ -215,10 +295,8 @@ def main():
         output["melFilterbank"] = filterbank_data
 
     # Save
-    output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2)
+    write_json(output_path, output)
 
     print(f"\nReference data saved to: {output_path}")
     print(f"File size: {output_path.stat().st_size / 1024:.1f} KB")
@@ -29,9 +29,11 @@ def load_audio(audio_path: str, target_sr: int = 16000) -> tuple[np.ndarray, int
         import soundfile as sf
         audio, sr = sf.read(audio_path)
         if sr != target_sr:
-            # Simple linear resampling (for testing purposes)
+            # Polyphase FIR resampling at the exact rational ratio (e.g. 160/441 for 44.1 kHz)
+            from fractions import Fraction
             from scipy import signal
-            audio = signal.resample(audio, int(len(audio) * target_sr / sr))
+            ratio = Fraction(target_sr, sr)
+            audio = signal.resample_poly(audio, ratio.numerator, ratio.denominator)
             sr = target_sr
         return audio.astype(np.float32), sr
     except ImportError:
@@ -92,10 +94,20 @@ def transcribe_with_onnx_asr(audio_path: str, model_name: str = "istupakov/parak
     return output
 
 
-def transcribe_with_debug(audio_path: str, model_name: str = "istupakov/parakeet-tdt-0.6b-v2-onnx") -> dict:
+def transcribe_with_debug(
+    audio_path: str, model_name: str = "istupakov/parakeet-tdt-0.6b-v2-onnx", decode_batch: int = 1
+) -> dict:
     """
     Transcribe with detailed debug output to compare decoder state handling.
+
+    With decode_batch > 1, decoder_joint is run speculatively on a window of that many
+    encoder frames (assuming the decoder state stays put), and re-run only once a token
+    is emitted or the walk leaves the window. Requires a dynamic time axis on
+    encoder_outputs; otherwise falls back to one frame per call.
     """
+    if decode_batch < 1:
+        raise ValueError("decode_batch must be >= 1")
+    
     import onnxruntime as rt
     from huggingface_hub import hf_hub_download
     
@@ -169,7 +181,7 @@ def transcribe_with_debug(audio_path: str, model_name: str = "istupakov/parakeet
     encoder_out = encoder_out.transpose(0, 2, 1)
     print(f"Transposed encoder shape: {encoder_out.shape}")
     
-    # Initialize decoder state
+    # Initialize decoder state (persistent buffers, updated in place on non-blank tokens)
     state1 = np.zeros((shapes["input_states_1"][0], 1, shapes["input_states_1"][2]), dtype=np.float32)
     state2 = np.zeros((shapes["input_states_2"][0], 1, shapes["input_states_2"][2]), dtype=np.float32)
     
@@ -181,34 +193,62 @@ def transcribe_with_debug(audio_path: str, model_name: str = "istupakov/parakeet
     
     t = 0
     emitted_tokens = 0
-    prev_state = (state1, state2)
     
     encodings = encoder_out[0]  # [T, D]
     encodings_len = int(encoder_lens[0])
     
+    if decode_batch > 1 and isinstance(shapes["encoder_outputs"][2], int):
+        print(f"encoder_outputs has a fixed time axis; ignoring decode_batch={decode_batch}")
+        decode_batch = 1
+    
+    # Bind persistent input buffers once; each frame only overwrites their contents.
+    input_types = {x.name: x.type for x in decoder_joint.get_inputs()}
+    index_dtype = {name: np.int64 if input_types[name] == "tensor(int64)" else np.int32 for name in ("targets", "target_length")}
+    encoder_buf = np.zeros((1, encodings.shape[1], decode_batch), dtype=np.float32)  # [1, D, K]
+    targets_buf = np.zeros((1, 1), dtype=index_dtype["targets"])
+    target_length_buf = np.ones(1, dtype=index_dtype["target_length"])
+    io = decoder_joint.io_binding()
+    io.bind_ortvalue_input("encoder_outputs", rt.OrtValue.ortvalue_from_numpy(encoder_buf))
+    io.bind_ortvalue_input("targets", rt.OrtValue.ortvalue_from_numpy(targets_buf))
+    io.bind_ortvalue_input("target_length", rt.OrtValue.ortvalue_from_numpy(target_length_buf))
+    io.bind_ortvalue_input("input_states_1", rt.OrtValue.ortvalue_from_numpy(state1))
+    io.bind_ortvalue_input("input_states_2", rt.OrtValue.ortvalue_from_numpy(state2))
+    for name in ("outputs", "output_states_1", "output_states_2"):
+        io.bind_output(name, "cpu")
+    
+    # The joint output width is not always static in the graph metadata: probe it once, then have
+    # every later call write logits and states straight into persistent buffers.
+    decoder_joint.run_with_iobinding(io)
+    probe_shapes = [value.shape() for value in io.get_outputs()]
+    logits_buf = np.empty(probe_shapes[0], dtype=np.float32)  # [1, K, 1, V + durations]
+    out_state1 = np.empty(probe_shapes[1], dtype=np.float32)
+    out_state2 = np.empty(probe_shapes[2], dtype=np.float32)
+    for name, buf in (("outputs", logits_buf), ("output_states_1", out_state1), ("output_states_2", out_state2)):
+        io.bind_output(name, "cpu", 0, np.float32, buf.shape, buf.ctypes.data)
+    window_logits = logits_buf.reshape(decode_batch, -1)
+    
     print(f"\nDecoding {encodings_len} frames...")
     
+    window_start = None  # first frame of the current decoder window; None once stale
+    decoder_calls = 0
+    
     while t < encodings_len:
-        frame = encodings[t]  # [D]
+        if window_start is None or t >= window_start + decode_batch:
+            # Frames past the end of the audio are zero padding and never consumed.
+            window = encodings[t:t + decode_batch]
+            encoder_buf[0, :, :len(window)] = window.T
+            encoder_buf[0, :, len(window):] = 0
+            targets_buf[0, 0] = tokens[-1] if tokens else blank_idx
+            
+            # Run decoder
+            decoder_joint.run_with_iobinding(io)
+            window_start = t
+            decoder_calls += 1
         
-        # Run decoder
-        outputs, new_state1, new_state2 = decoder_joint.run(
-            ["outputs", "output_states_1", "output_states_2"],
-            {
-                "encoder_outputs": frame[np.newaxis, :, np.newaxis],  # [1, D, 1]
-                "targets": [[tokens[-1] if tokens else blank_idx]],
-                "target_length": [1],
-                "input_states_1": prev_state[0],
-                "input_states_2": prev_state[1],
-            }
-        )
-        
-        logits = np.squeeze(outputs)
-        token_logits = logits[:vocab_size]
-        dur_logits = logits[vocab_size:]
-        
-        token = int(token_logits.argmax())
-        step = int(dur_logits.argmax()) if len(dur_logits) > 0 else 0
+        # Token logits come first, TDT duration logits (if any) after them.
+        logits = window_logits[t - window_start]
+        token = int(logits[:vocab_size].argmax())
+        step = int(logits[vocab_size:].argmax()) if logits.size > vocab_size else 0
         
         # Debug info for this frame
         frame_debug = {
@@ -221,8 +261,10 @@ def transcribe_with_debug(audio_path: str, model_name: str = "istupakov/parakeet
         }
         
         if token != blank_idx:
-            # CRITICAL: Only update state on non-blank token
-            prev_state = (new_state1, new_state2)
+            # CRITICAL: Only update state on non-blank token (committed into the bound input buffers)
+            np.copyto(state1, out_state1)
+            np.copyto(state2, out_state2)
+            window_start = None  # the rest of the window was computed with the old state
             tokens.append(token)
             timestamps.append(t)
             emitted_tokens += 1
@@ -243,7 +285,7 @@ def transcribe_with_debug(audio_path: str, model_name: str = "istupakov/parakeet
     text = "".join(text_tokens).strip()
     
     print(f"\nFinal transcription: {text}")
-    print(f"Total tokens: {len(tokens)}")
+    print(f"Total tokens: {len(tokens)}, decoder calls: {decoder_calls}")
     
     return {
         "text": text,
@@ -263,11 +305,19 @@ def main():
     parser.add_argument("--model", default="istupakov/parakeet-tdt-0.6b-v2-onnx", help="Model name on HuggingFace Hub")
     parser.add_argument("--output", default="tests/reference_output.json", help="Output JSON path")
     parser.add_argument("--debug", action="store_true", help="Run with detailed debug output")
+    parser.add_argument(
+        "--decode-batch",
+        type=int,
+        default=1,
+        help="Encoder frames per speculative decoder_joint call in --debug mode (needs a dynamic time axis)",
+    )
     
     args = parser.parse_args()
+    if args.decode_batch < 1:
+        parser.error("--decode-batch must be >= 1")
     
     if args.debug:
-        result = transcribe_with_debug(args.audio, args.model)
+        result = transcribe_with_debug(args.audio, args.model, args.decode_batch)
     else:
         result = transcribe_with_onnx_asr(args.audio, args.model)
     